@@ -1,4 +1,4 @@
-from functools import cache
+from collections.abc import Iterable
 
 from rich.color import Color, blend_rgb
 from rich.style import Style
@@ -9,30 +9,32 @@ DEEP_SKY_BLUE = Color.parse("deep_sky_blue4")
 GREEN = Color.parse("green")
 RED = Color.parse("red")
 
-RGB_COLORS_COUNT = 256 * 256
+GREEN_RGB = GREEN.get_truecolor()
+RED_RGB = RED.get_truecolor()
+
+GRAY = Style(color=DEEP_SKY_BLUE)
+
+# 8-bit blend between green and red has ~200 distinct colors, 1024 steps cover all
+RGB_COLORS_COUNT = 1024
 
 
 def get_color(value: int, max_value: int) -> Style:
     assert User is not None
     if not value:
-        return get_gray()
+        return GRAY
 
     cross_fade = value / max_value if max_value else 0
-    return _get_color(min(int(cross_fade * RGB_COLORS_COUNT), RGB_COLORS_COUNT))
+    return COLORS[min(int(cross_fade * RGB_COLORS_COUNT), RGB_COLORS_COUNT)]
 
 
-@cache
-def get_gray() -> Style:
-    return Style(color=DEEP_SKY_BLUE)
+def _make_color(cross_fade: int) -> Style:
+    # With x0.8 red starts from 80% (0.9=70%, 0.7=90%)
+    rgb = blend_rgb(GREEN_RGB, RED_RGB, cross_fade=cross_fade / RGB_COLORS_COUNT * 0.8)
+    return Style(color=Color.from_triplet(rgb))
 
 
-@cache
-def _get_color(cross_fade: int) -> Style:
-    # With x0.8 red starts from 80% (0.9=70%, 0.7=90%)
-    return Style(color=blend_colors(GREEN, RED, cross_fade / RGB_COLORS_COUNT * 0.8))
+COLORS = tuple(_make_color(i) for i in range(RGB_COLORS_COUNT + 1))
 
 
-def blend_colors(color1: Color, color2: Color, cross_fade: float) -> Color:
-    return Color.from_triplet(
-        blend_rgb(color1.get_truecolor(), color2.get_truecolor(), cross_fade=cross_fade)
-    )
+def get_colors(values: Iterable[int], max_value: int) -> dict[int, Style]:
+    return {value: get_color(value, max_value) for value in {0, *values}}
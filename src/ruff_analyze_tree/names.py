@@ -1,18 +1,29 @@
 import posixpath
+from functools import cache
 from itertools import chain
 
-from ruff_analyze_tree.tools import unique
 from ruff_analyze_tree.types import ImportPath, ImportPathOrRoot, RootPath, RuffRawData
 
 
 def find_root_path(data: RuffRawData) -> RootPath:
-    files = sorted(unique(chain(data, chain.from_iterable(data.values()))))
-    return posixpath.commonpath(files[:1] + files[-1:]) if len(files) >= 2 else ""
+    # Common path of the lexicographically first and last files is common for all
+    files = chain(data, chain.from_iterable(data.values()))
+    first = last = next(files, "")
+    for file in files:
+        if file < first:
+            first = file
+        elif file > last:
+            last = file
+
+    return posixpath.commonpath([first, last]) if first != last else ""
 
 
 def convert_module_filepath_to_package_name(root: str, filepath: str) -> ImportPath:
-    path, _ = posixpath.splitext(filepath)
-    return path.removeprefix(root).lstrip("/").replace("/", ".").lower()
+    # Cheaper `posixpath.splitext`, extension is cut only from file name
+    dot = filepath.rfind(".")
+    if dot > filepath.rfind("/") + 1:
+        filepath = filepath[:dot]
+    return filepath.removeprefix(root).lstrip("/").replace("/", ".").lower()
 
 
 def join_package(package: ImportPathOrRoot, name: str) -> str:
@@ -23,18 +34,22 @@ def join_package(package: ImportPathOrRoot, name: str) -> str:
     return name
 
 
+@cache
 def split_package(module: ImportPath) -> tuple[ImportPathOrRoot, str, bool]:
-    return _split_package(module)
+    is_init_module = False
+    while True:
+        package, separator, name = module.rpartition(".")
+        if not separator:
+            return "", name, is_init_module
 
+        if name != "__init__":
+            return package, name, is_init_module
 
-def _split_package(
-    module: str, is_init_module: bool = False
-) -> tuple[ImportPath, str, bool]:
-    chunks = module.rsplit(".", 1)
-    if len(chunks) == 1:
-        return "", chunks[0], is_init_module
+        module = package
+        is_init_module = True
 
-    if chunks[-1] == "__init__":
-        return _split_package(chunks[0], True)
 
-    return chunks[0], chunks[1], is_init_module
+def get_tree_depth(import_path: ImportPath) -> int:
+    # Depth of the node made for the path: `a.b.__init__` is package `a.b`
+    package, _, _ = split_package(import_path)
+    return package.count(".") + 1 if package else 0
@@ -6,28 +6,41 @@ ruff analyze graph src | python -m ruff_analyze_tree
 
 import json
 import posixpath
-import statistics
 import sys
 from collections import Counter
 from collections.abc import Collection, Iterable, Mapping
-from dataclasses import dataclass, field
-from functools import cache
+from dataclasses import dataclass
 from itertools import chain
-from operator import attrgetter
-from typing import Self, TypeAlias
+from typing import BinaryIO, TypeAlias
 
 from rich.console import Console
 from rich.markup import escape
 from rich.style import Style
 from rich.tree import Tree
 
-from ruff_analyze_tree.colors import get_color
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from ruff_analyze_tree.colors import get_colors
 from ruff_analyze_tree.names import (
     convert_module_filepath_to_package_name,
     find_root_path,
+    get_tree_depth,
     split_package,
 )
-from ruff_analyze_tree.tools import unique
+from ruff_analyze_tree.stats import (
+    get_mean,
+    get_quantile,
+    get_sorted_median,
+    get_sorted_quantile,
+)
 from ruff_analyze_tree.types import (
     ImportPath,
     ImportPathOrRoot,
@@ -78,7 +91,7 @@ def main() -> None:
     assert 0 <= quantile_param <= 100
     quantile = quantile_param * QUANTILE_FACTOR
 
-    raw_data = json.load(sys.stdin)
+    raw_data = read_ruff_data(sys.stdin.buffer)
     root_path = find_root_path(raw_data)
 
     data, root_import = convert_file_path_to_import_strings(root_path, raw_data)
@@ -87,23 +100,24 @@ def main() -> None:
             deps_target_module, root_path, data
         )
 
-    duplicated_dependencies = tuple(chain.from_iterable(data.values()))
-    counted_dependencies = Counter(duplicated_dependencies)
+    # Counter counts an iterable in C, faster than a `dict.get` loop or `.update()`
+    counted_dependencies = Counter(chain.from_iterable(data.values()))
 
     root_package = get_finalized_tree(
         root_import,
         data,
-        unique(duplicated_dependencies),
+        counted_dependencies.keys(),
         counted_dependencies,
         int(quantile_param),
     )
 
-    relations_counters = tuple(counted_dependencies.values())
+    relations_counters = sorted(counted_dependencies.values())
     if len(relations_counters) >= 2:
-        quantiles = statistics.quantiles(
-            relations_counters, n=100 * QUANTILE_FACTOR + 1
+        dependencies_quantile = int(
+            get_sorted_quantile(
+                relations_counters, max(int(quantile), 1), 100 * QUANTILE_FACTOR + 1
+            )
         )
-        dependencies_quantile = int(quantiles[max(int(quantile) - 1, 0)])
         show_numbers = not hide_counters
     else:
         dependencies_quantile = 0
@@ -112,35 +126,51 @@ def main() -> None:
 
     draw_options = DrawOptions(
         quantile=quantile_param,
-        dependencies_quantile=dependencies_quantile,
         skip_dependencies=hide_deps,
         only_deps=only_deps,
         skip_zero=hide_zero,
-        uncolorize=uncolorize,
         show_numbers=show_numbers,
     )
 
-    visible_first_level = [
-        c for c in root_package.children if c.is_visible(draw_options)
-    ]
+    for package in reversed(root_package.collect_packages()):
+        package.apply_visibility(draw_options)
+
+    visible_first_level = [c for c in root_package.children if c.visible]
     if len(visible_first_level) == 1:
         root_import = root_package.name
         root_package = visible_first_level[0]
 
     tree_root = Tree(f"✨✨✨ [b green]{root_import} modules ✨✨✨", highlight=True)
 
-    draw_tree(tree_root, root_package, draw_options)
+    # Style depends only on relations counter, so it's made once per counter
+    styles = (
+        None
+        if only_deps or uncolorize
+        else get_colors(counted_dependencies.values(), dependencies_quantile)
+    )
+    draw_tree(tree_root, root_package, draw_options, styles)
 
     CONSOLE.print(tree_root)
 
     if not hide_stats and len(relations_counters) >= 2:
         CONSOLE.print()
         CONSOLE.print("Dependencies statistics:")
-        CONSOLE.print(f"Arithmetic mean: {statistics.mean(relations_counters)}")
-        CONSOLE.print(f"Median (middle value): {statistics.median(relations_counters)}")
+        CONSOLE.print(f"Arithmetic mean: {get_mean(relations_counters)}")
+        CONSOLE.print(f"Median (middle value): {get_sorted_median(relations_counters)}")
         CONSOLE.print(f"Quantile ({quantile_param}%): {dependencies_quantile}")
 
 
+def read_ruff_data(stream: BinaryIO) -> RuffRawData:
+    if orjson is not None:
+        return orjson.loads(stream.read())
+
+    if ijson is not None:
+        # Whole graph is still built, only raw JSON text isn't buffered next to it
+        return dict(ijson.kvitems(stream, ""))
+
+    return json.load(stream)
+
+
 def get_arg(name: str, default: str) -> str:
     try:
         return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
@@ -151,24 +181,38 @@ def get_arg(name: str, default: str) -> str:
 @dataclass(slots=True, frozen=True)
 class DrawOptions:
     quantile: float
-    dependencies_quantile: int
     skip_dependencies: bool = False
     only_deps: bool = False
     skip_zero: bool = False
-    uncolorize: bool = False
     show_numbers: bool = True
 
-    @property
-    def colorize(self) -> bool:
-        return not self.only_deps
-
 
-@dataclass(slots=True)
+# Nodes are made for every module of the repo, so they have hand written
+# positional `__init__` instead of slower generated dataclass one.
+# Subclasses repeat the `PyImported` assignments on purpose: a `super().__init__`
+# call would cost an extra frame per node.
 class PyImported:
+    __slots__ = ("direct_relations", "import_path", "is_dependency", "name", "visible")
+
     import_path: ImportPath
     name: str
     is_dependency: bool
     direct_relations: int
+    visible: bool
+
+    def __init__(
+        self,
+        import_path: ImportPath,
+        name: str,
+        is_dependency: bool,
+        direct_relations: int,
+        /,
+    ) -> None:
+        self.import_path = import_path
+        self.name = name
+        self.is_dependency = is_dependency
+        self.direct_relations = direct_relations
+        self.visible = True
 
     @property
     def total_relations(self) -> int:
@@ -187,65 +231,118 @@ class PyImported:
         return True
 
 
-@dataclass(slots=True)
 class Module(PyImported):
-    parent: "Package"
+    __slots__ = ("parent",)
 
-    def apply_counters(self) -> int:
-        return self.direct_relations
+    parent: "Package"
 
-    __eq__ = object.__eq__  # pyright: ignore[reportAssignmentType]
-    __hash__ = object.__hash__  # pyright: ignore[reportAssignmentType]
+    def __init__(
+        self,
+        import_path: ImportPath,
+        name: str,
+        is_dependency: bool,
+        direct_relations: int,
+        parent: "Package",
+        /,
+    ) -> None:
+        self.import_path = import_path
+        self.name = name
+        self.is_dependency = is_dependency
+        self.direct_relations = direct_relations
+        self.visible = True
+        self.parent = parent
 
 
-@dataclass(slots=True, eq=False)
 class Package(PyImported):
-    parent: "Self | None" = None
-    children: list[Module | Self] = field(default_factory=list)
-    sub_packages: list[Self] = field(default_factory=list)
-    children_relations: int = 0
-    children_quantile: int = 0
-    is_init_module: bool = False
+    __slots__ = (
+        "children",
+        "children_quantile",
+        "children_relations",
+        "is_init_module",
+        "parent",
+        "sub_packages",
+    )
+
+    parent: "Package | None"
+    children: list["Module | Package"]
+    sub_packages: list["Package"]
+    children_relations: int
+    children_quantile: int
+    is_init_module: bool
+
+    def __init__(
+        self,
+        import_path: ImportPath,
+        name: str,
+        is_dependency: bool,
+        direct_relations: int,
+        parent: "Package | None" = None,
+        is_init_module: bool = False,
+        /,
+    ) -> None:
+        self.import_path = import_path
+        self.name = name
+        self.is_dependency = is_dependency
+        self.direct_relations = direct_relations
+        self.visible = True
+        self.parent = parent
+        self.children = []
+        self.sub_packages = []
+        self.children_relations = 0
+        self.children_quantile = 0
+        self.is_init_module = is_init_module
 
     def add_module(self, module: Module) -> None:
         self.children.append(module)
 
-    def add_package(self, package: Self) -> None:
+    def add_package(self, package: "Package") -> None:
         self.children.append(package)
         self.sub_packages.append(package)
 
+    def collect_packages(self) -> list["Package"]:
+        # Every package goes after its parent, no recursion for deep trees
+        packages: list[Package] = [self]
+        for package in packages:
+            packages.extend(package.sub_packages)
+        return packages
+
     def sort(self) -> None:
-        self.children.sort(key=attrgetter("name"))
-        for obj in self.sub_packages:
-            obj.sort()
+        # Package goes before module with the same name (`core/` and `core.py`),
+        # whatever order they were added in
+        self.children.sort(key=lambda obj: (obj.name, isinstance(obj, Module)))
 
-    def apply_counters(self) -> int:
-        self.children_relations = summary = sum(
-            obj.apply_counters() for obj in self.children
-        )
-        return summary + self.direct_relations
+    def apply_counters(self) -> None:
+        # Sub-packages must be counted first
+        self.children_relations = sum(obj.total_relations for obj in self.children)
 
     def apply_quantiles(self, quantile: int) -> None:
         if len(self.children) < 2:
             self.children_quantile = 0
             return
 
-        quantiles = statistics.quantiles(
-            [obj.total_relations for obj in self.children], n=100 + 1
+        self.children_quantile = int(
+            get_quantile(
+                (obj.total_relations for obj in self.children),
+                max(quantile, 1),
+                100 + 1,
+            )
         )
-        self.children_quantile = int(quantiles[max(quantile - 1, 0)])
-
-        for obj in self.sub_packages:
-            obj.apply_quantiles(quantile)
 
     @property
     def total_relations(self) -> int:
         return self.direct_relations + self.children_relations
 
-    @cache
+    def apply_visibility(self, options: DrawOptions) -> None:
+        # Sub-packages must be checked first
+        for obj in self.children:
+            if isinstance(obj, Module):
+                obj.visible = obj.is_visible(options)
+
+        self.visible = self.is_visible(options)
+
     def is_visible(self, options: DrawOptions) -> bool:
         for c in self.children:
-            if c.is_visible(options):
+            if c.visible:
                 return True
 
         if self.is_dependency:
@@ -259,9 +356,6 @@ class Package(PyImported):
 
         return True
 
-    __eq__ = object.__eq__  # pyright: ignore[reportAssignmentType]
-    __hash__ = object.__hash__  # pyright: ignore[reportAssignmentType]
-
 
 @dataclass(frozen=True, slots=True)
 class PyFactory:
@@ -274,9 +368,9 @@ class PyFactory:
         module = Module(
             import_path,
             name,
-            is_dependency=self.is_dependency,
-            direct_relations=self.counters.get(import_path, 0),
-            parent=parent,
+            self.is_dependency,
+            self.counters.get(import_path, 0),
+            parent,
         )
         return self.modules.setdefault(import_path, module)
 
@@ -292,28 +386,44 @@ class PyFactory:
         package = Package(
             import_path,
             name,
-            is_dependency=self.is_dependency,
-            direct_relations=self.counters.get(import_path, 0),
-            is_init_module=is_init_module,
-            parent=parent,
+            self.is_dependency,
+            self.counters.get(import_path, 0),
+            parent,
+            is_init_module,
         )
         return self.packages.setdefault(import_path, package)
 
 
 def draw_tree(
-    parent: Tree, package_or_module: Package | Module, options: DrawOptions
+    parent: Tree,
+    package_or_module: Package | Module,
+    options: DrawOptions,
+    styles: Mapping[int, Style] | None,
 ) -> None:
-    match package_or_module:
-        case Package():
-            draw_package(parent, package_or_module, options)
-        case Module():
-            draw_module(parent, package_or_module, options)
-
-
-def draw_package(parent: Tree, package: Package, options: DrawOptions) -> None:
-    if not package.is_visible(options):
-        return
-
+    # Options are read once, nodes are drawn with plain arguments
+    show_numbers = options.show_numbers
+
+    # No recursion for deep trees, children are pushed reversed to keep their order
+    stack: list[tuple[Tree, Package | Module]] = [(parent, package_or_module)]
+    while stack:
+        parent, obj = stack.pop()
+        if not obj.visible:
+            continue
+
+        match obj:
+            case Package():
+                new_node = draw_package(parent, obj, styles, show_numbers)
+                stack.extend((new_node, c) for c in reversed(obj.children))
+            case Module():
+                draw_module(parent, obj, styles, show_numbers)
+
+
+def draw_package(
+    parent: Tree,
+    package: Package,
+    styles: Mapping[int, Style] | None,
+    show_numbers: bool,
+) -> Tree:
     # guide_style = (
     #     get_color(p.total_relations, pp.children_quantile)
     #     if ((p := package.parent) and (pp := p.parent))
@@ -322,42 +432,34 @@ def draw_package(parent: Tree, package: Package, options: DrawOptions) -> None:
     star = "*" if package.is_dependency else ""
     numers = (
         f" ({package.direct_relations}) {{{package.children_relations}}}"
-        if options.show_numbers
+        if show_numbers
         else ""
     )
-    new_node = parent.add(
+    return parent.add(
         escape(f"{package.name}{star}{numers}"),
-        style=get_style(package, options),
+        style=None if styles is None else styles[package.direct_relations],
     )
 
-    for obj in package.children:
-        draw_tree(new_node, obj, options)
-
-
-def draw_module(parent: Tree, module: Module, options: DrawOptions) -> None:
-    if not module.is_visible(options):
-        return
 
+def draw_module(
+    parent: Tree,
+    module: Module,
+    styles: Mapping[int, Style] | None,
+    show_numbers: bool,
+) -> None:
     # guide_style = (
     #     get_color(p.total_relations, pp.children_quantile)
     #     if ((p := module.parent) and (pp := p.parent))
     #     else None
     # )
     star = "*" if module.is_dependency else ""
-    numers = f" ({module.direct_relations})" if options.show_numbers else ""
+    numers = f" ({module.direct_relations})" if show_numbers else ""
     parent.add(
         f"{module.name}{star}{numers}",
-        style=get_style(module, options),
+        style=None if styles is None else styles[module.direct_relations],
     )
 
 
-def get_style(module: Package | Module, options: DrawOptions) -> Style | None:
-    if options.only_deps or options.uncolorize:
-        return None
-
-    return get_color(module.direct_relations, options.dependencies_quantile)
-
-
 def get_finalized_tree(
     root_name: ImportPathOrRoot,
     imports: Collection[ImportPath],
@@ -369,9 +471,13 @@ def get_finalized_tree(
         root_name, imports, dependencies, counted_dependencies
     )
 
-    root_package.sort()
-    root_package.apply_counters()
-    root_package.apply_quantiles(quantile)
+    packages = root_package.collect_packages()
+    for package in packages:
+        package.sort()
+    for package in reversed(packages):
+        package.apply_counters()
+    for package in packages:
+        package.apply_quantiles(quantile)
 
     return root_package
 
@@ -382,23 +488,35 @@ def build_modules_tree(
     dependencies: Iterable[ImportPath],
     counted_dependencies: Mapping[ImportPath, int],
 ) -> Package:
-    root_package = Package(
-        import_path="", name=root_name, is_dependency=False, direct_relations=0
-    )
+    root_package = Package("", root_name, False, 0)
     packages: Packages = {"": root_package}
     modules: Modules = {}
 
-    append_imports_to_tree(imports, PyFactory(counted_dependencies, modules, packages))
+    factory = PyFactory(counted_dependencies, modules, packages)
+    dependencies_factory = PyFactory(
+        counted_dependencies, modules, packages, is_dependency=True
+    )
+    # Parents go first, so their packages are usually made already
+    append_imports_to_tree(
+        (path, factory) for path in sorted(imports, key=get_tree_depth)
+    )
+
+    # Only packages made by imports are skipped: the dict keeps growing below,
+    # and a dependency module may share its import path with a dependency package
+    imports_packages = set(packages)
     append_imports_to_tree(
-        unique(dependencies, visited=set(imports) | set(packages)),
-        PyFactory(counted_dependencies, modules, packages, is_dependency=True),
+        (path, dependencies_factory)
+        for path in sorted(
+            (p for p in dependencies if p not in imports and p not in imports_packages),
+            key=get_tree_depth,
+        )
     )
 
     return root_package
 
 
-def append_imports_to_tree(imports: Iterable[ImportPath], factory: PyFactory) -> None:
-    for import_path in imports:
+def append_imports_to_tree(imports: Iterable[tuple[ImportPath, PyFactory]]) -> None:
+    for import_path, factory in imports:
         append_module_or_package_to_tree(import_path, factory)
 
 
@@ -433,21 +551,24 @@ def append_module_or_package_to_tree(
 
 
 def get_or_make_package(import_path: ImportPathOrRoot, factory: PyFactory) -> Package:
-    parent_import, name, is_init_module = split_package(import_path)
-
-    package_import = f"{parent_import}.{name}" if parent_import else name
-    if (package := factory.get_package(package_import)) is not None:
-        return package
-
-    assert not is_init_module
-    parent_package = get_or_make_package(parent_import, factory)
-    package = factory.package(
-        parent_package,
-        import_path=package_import,
-        name=name,
-        is_init_module=is_init_module,
-    )
-    parent_package.add_package(package)
+    # Find the closest known ancestor, then make the missing packages down from it
+    missing: list[tuple[ImportPath, str]] = []
+    while (package := factory.get_package(import_path)) is None:
+        parent_import, name, is_init_module = split_package(import_path)
+        assert not is_init_module
+        missing.append((import_path, name))
+        import_path = parent_import
+
+    for package_import, name in reversed(missing):
+        sub_package = factory.package(
+            package,
+            import_path=package_import,
+            name=name,
+            is_init_module=False,
+        )
+        package.add_package(sub_package)
+        package = sub_package
+
     return package
 
 
@@ -480,11 +601,18 @@ def is_sub_module(target: ImportPath, module: ImportPath) -> bool:
 def convert_file_path_to_import_strings(
     root_path: RootPath, data: RuffRawData
 ) -> tuple[RuffPythonicData, ImportPathOrRoot]:
+    # Same dependencies are imported by many modules, convert each path once
+    converted: dict[str, ImportPath] = {}
+
+    def convert(filepath: str) -> ImportPath:
+        if (import_path := converted.get(filepath)) is None:
+            import_path = converted[filepath] = convert_module_filepath_to_package_name(
+                root_path, filepath
+            )
+        return import_path
+
     modules_map = {
-        convert_module_filepath_to_package_name(root_path, name): [
-            convert_module_filepath_to_package_name(root_path, dep)
-            for dep in dependencies
-        ]
+        convert(name): [convert(dep) for dep in dependencies]
         for name, dependencies in data.items()
     }
     root_module = convert_module_filepath_to_package_name(
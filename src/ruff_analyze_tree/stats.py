@@ -0,0 +1,36 @@
+from collections.abc import Iterable, Sequence
+
+
+def get_quantile(values: Iterable[int], position: int, n: int) -> float:
+    # Selecting two neighbour values (heapq) is not faster than C sort in CPython,
+    # so sort once, ideally straight from an iterator to avoid extra copy
+    return get_sorted_quantile(sorted(values), position, n)
+
+
+def get_sorted_quantile(data: Sequence[int], position: int, n: int) -> float:
+    # Same as `statistics.quantiles(data, n=n)[position - 1]` ("exclusive" method),
+    # but computes only one cut point instead of all `n - 1`.
+    assert len(data) >= 2, data
+    assert 1 <= position < n, (position, n)
+
+    size = len(data)
+    m = size + 1
+    j = min(max(position * m // n, 1), size - 1)
+    delta = position * m - j * n
+    return (data[j - 1] * (n - delta) + data[j] * delta) / n
+
+
+def get_mean(values: Sequence[int]) -> float:
+    assert values
+    total = sum(values)
+    # Keep `statistics.mean` output: integral means are printed without ".0"
+    return total // len(values) if total % len(values) == 0 else total / len(values)
+
+
+def get_sorted_median(data: Sequence[int]) -> float:
+    assert data
+    middle = len(data) // 2
+    if len(data) % 2:
+        return data[middle]
+
+    return (data[middle - 1] + data[middle]) / 2